@@ -0,0 +1,229 @@
+# ASGI-Modus des Backends für viele gleichzeitige Dashboard-Nutzer mit wenigen Prozessen:
+#
+#   uvicorn AsyncBackend:app --port 5000 --workers 2
+#
+# Nativ asynchron auf einem asyncpg-Pool laufen nur /api/metrics und /api/scatterplot, die beiden
+# Routen, die das Dashboard bei jedem Aufruf lädt; die unabhängigen KPI-Abfragen von /api/metrics laufen
+# mit asyncio.gather gleichzeitig, ohne pro Abfrage einen Thread zu belegen.
+# Alle anderen Routen liefert die Flask-App über a2wsgi: jede Anfrage belegt für ihre ganze Dauer
+# einen von WSGI_WORKERS Threads (Standard 10), wie unter gunicorn mit Threads. Für diese Routen
+# bringt der ASGI-Modus also keine zusätzliche Parallelität.
+# Abfragen, Auswertung und Response-Cache (Cache-Key, Single-Flight, Stale-While-Revalidate, ETag,
+# gzip/Brotli, Kennzahlen) sind dieselben wie in Backend.py, siehe async_cached.
+
+import asyncio
+import contextlib
+from datetime import date, datetime
+import os
+import time
+
+from a2wsgi import WSGIMiddleware
+from flask import request as flask_request
+from sqlalchemy import event, text
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import create_async_engine
+from starlette.applications import Starlette
+from starlette.concurrency import run_in_threadpool
+from starlette.responses import Response
+from starlette.routing import Mount, Route
+
+# Der asyncpg-Pool und der Pool der Flask-App teilen sich das Budget DB_POOL_SIZE + DB_MAX_OVERFLOW;
+# Backend.py teilt es beim Import auf, deshalb muss der Anteil vorher feststehen
+os.environ.setdefault('DB_POOL_ASYNC_SHARE', '0.5')
+
+from Backend import (
+    ASYNC_MAX_OVERFLOW, ASYNC_POOL_SIZE, METRICS_QUERIES, REPLICA_BINDS, TimedAsyncQueuePool, additional_pools,
+    app as flask_app, choose_read_target, claim_cache_entry, claim_refresh, compute_metrics, entry_response,
+    error_response, finish_refresh, lookup_cache_entry, metrics_params, observe_connection_age, parse_period,
+    period_filter, record_cache_wait, refresh_request, release_cache_lock, remember_connection_start,
+    request_metrics, scatterplot_query, scatterplot_rows, store_response_entry,
+)
+
+if ASYNC_POOL_SIZE < 1:
+    raise RuntimeError("Im ASGI-Modus braucht der asyncpg-Pool einen Anteil an DB_POOL_SIZE: DB_POOL_SIZE >= 2 und DB_POOL_ASYNC_SHARE > 0")
+
+
+# Timeout und Recycling wie beim Flask-Pool (DB_POOL_TIMEOUT, DB_POOL_RECYCLE)
+def create_asyncpg_engine(url, **kwargs):
+    engine_options = flask_app.config['SQLALCHEMY_ENGINE_OPTIONS']
+    return create_async_engine(
+        make_url(url).set(drivername='postgresql+asyncpg'),
+        poolclass=TimedAsyncQueuePool,
+        pool_size=ASYNC_POOL_SIZE,
+        max_overflow=ASYNC_MAX_OVERFLOW,
+        pool_timeout=engine_options['pool_timeout'],
+        pool_recycle=engine_options['pool_recycle'],
+        **kwargs,
+    )
+
+
+# Primary und Read-Replicas (DATABASE_REPLICA_URLS) unter denselben Namen wie die Binds in Backend.py;
+# welche Engine eine Berechnung nutzt, entscheidet choose_read_target() mit derselben Lag-Prüfung
+async_engines = {'primary': create_asyncpg_engine(flask_app.config['SQLALCHEMY_DATABASE_URI'])}
+for key in REPLICA_BINDS:
+    async_engines[key] = create_asyncpg_engine(flask_app.config['SQLALCHEMY_BINDS'][key]['url'], connect_args={'timeout': 5})
+for key, engine in async_engines.items():
+    additional_pools[f'async_{key}'] = engine.pool
+    event.listen(engine.sync_engine, 'connect', remember_connection_start)
+    event.listen(engine.sync_engine, 'checkout', observe_connection_age)
+
+background_tasks = set()
+inflight_computations = {}
+
+
+# asyncpg prüft Parametertypen streng: Datumsgrenzen, die mit timestamp-Spalten verglichen
+# werden, müssen datetime sein (für date-Spalten funktioniert datetime ebenfalls)
+def asyncpg_params(params):
+    return {
+        name: datetime.combine(value, datetime.min.time()) if type(value) is date else value
+        for name, value in params.items()
+    }
+
+
+# Engine für die Abfragen einer Berechnung; choose_read_target() liest nur den Stand der
+# Lag-Prüfung in den Hintergrund-Threads und blockiert die Event-Loop daher nicht
+async def read_engine():
+    if not REPLICA_BINDS:
+        return async_engines['primary']
+    return async_engines[choose_read_target()]
+
+
+async def fetch_all(engine, query, params):
+    async with engine.connect() as connection:
+        return (await connection.execute(text(query), asyncpg_params(params))).fetchall()
+
+
+async def run_queries_concurrently(queries, params):
+    engine = await read_engine()
+    results = await asyncio.gather(*(fetch_all(engine, query, params) for query in queries.values()))
+    return dict(zip(queries, results))
+
+
+# Eintrag berechnen: das Ergebnis der Route als JSON-Antwort wie jsonify, gespeichert über
+# store_response_entry. Liefert wie Backend.compute_cache_entry (Eintrag, Antwort).
+async def compute_cache_entry(key, compute, args, timeout):
+    response = flask_app.json.response(await compute(args))
+    return await run_in_threadpool(store_response_entry, key, response, timeout), response
+
+
+# Single-Flight wie in Backend.py: je Key eine Berechnung pro Prozess (alle Wartenden teilen sich
+# deren Task) und prozessübergreifend über den Lock im geteilten Cache (claim_cache_entry)
+async def compute_with_cache_lock(key, compute, args, timeout, labels):
+    entry, lock_token = await run_in_threadpool(claim_cache_entry, key, labels)
+    if entry is not None:
+        return entry, None
+    try:
+        return await compute_cache_entry(key, compute, args, timeout)
+    finally:
+        if lock_token:
+            await run_in_threadpool(release_cache_lock, key, lock_token)
+
+
+async def compute_single_flight(key, compute, args, timeout, labels):
+    task = inflight_computations.get(key)
+    if task is None:
+        task = asyncio.ensure_future(compute_with_cache_lock(key, compute, args, timeout, labels))
+        inflight_computations[key] = task
+        task.add_done_callback(lambda _: inflight_computations.pop(key, None))
+        return await asyncio.shield(task)
+    started = time.perf_counter()
+    result = await asyncio.shield(task)
+    record_cache_wait(labels, started, 'coalesced')
+    return result
+
+
+# Aktualisierung wie Backend.refresh_in_background, als Task in der Event-Loop statt im Thread-Pool
+def refresh_in_background(key, compute, timeout):
+    path, query_string = refresh_request()
+
+    async def refresh():
+        # Die SQL-Zeit der Aktualisierung gehört nicht zur auslösenden Anfrage
+        request_metrics.set(None)
+        lock_token = await run_in_threadpool(claim_refresh, key)
+        if not lock_token:
+            return
+        try:
+            with flask_app.test_request_context(path, query_string=query_string):
+                await compute_cache_entry(key, compute, flask_request.args, timeout)
+        except Exception as e:
+            flask_app.logger.error(f"Cache-Aktualisierung für {key} fehlgeschlagen: {e}")
+        finally:
+            await run_in_threadpool(finish_refresh, key, lock_token)
+
+    task = asyncio.create_task(refresh())
+    background_tasks.add(task)
+    task.add_done_callback(background_tasks.discard)
+
+
+# Gegenstück zu api_cached für die asynchronen Routen. Jede Anfrage läuft in einem Request-Kontext
+# der Flask-App, damit Cache-Key (ausgehandeltes Format), Cache-Zustand, ETag/If-None-Match/
+# If-Modified-Since, Komprimierung und die Kennzahlen (SQL-Zeit, Zeilen, Antwortgröße) aus denselben
+# Funktionen und after_request-Hooks kommen wie in Backend.py.
+def async_cached(timeout):
+    def decorator(compute):
+        async def endpoint(request):
+            with flask_app.test_request_context(
+                request.url.path,
+                method=request.method,
+                query_string=request.url.query,
+                headers=list(request.headers.items()),
+            ):
+                flask_app.preprocess_request()
+                response = flask_app.make_response(await cached_response(compute, timeout))
+                response = flask_app.process_response(response)
+                return Response(response.get_data(), status_code=response.status_code, headers=dict(response.headers))
+        return endpoint
+    return decorator
+
+
+async def cached_response(compute, timeout):
+    labels = {'endpoint': flask_request.endpoint}
+    try:
+        key, entry, state = await run_in_threadpool(lookup_cache_entry, labels)
+        if state == 'bypass':
+            return flask_app.json.response(await compute(flask_request.args))
+        if state == 'miss':
+            entry, response = await compute_single_flight(key, compute, flask_request.args, timeout, labels)
+            if entry is None:
+                return response
+        elif state == 'stale':
+            refresh_in_background(key, compute, timeout)
+        return entry_response(entry)
+    except Exception as e:
+        return error_response(f"Fehler beim Abrufen der Daten: {e}")
+
+
+@async_cached(timeout=300)
+async def get_metrics(args):
+    year = args.get('year', default=2022, type=int)
+    results = await run_queries_concurrently(METRICS_QUERIES, metrics_params(year))
+    return compute_metrics(results, year)
+
+
+@async_cached(timeout=300)
+async def get_store_data(args):
+    date_filter, params = period_filter('d.orderday', parse_period(args=args))
+    return scatterplot_rows(await fetch_all(await read_engine(), scatterplot_query(date_filter), params))
+
+
+@contextlib.asynccontextmanager
+async def lifespan(app):
+    yield
+    for engine in async_engines.values():
+        await engine.dispose()
+
+
+app = Starlette(
+    routes=[
+        Route('/api/metrics', get_metrics),
+        Route('/api/scatterplot', get_store_data),
+        Mount('/', WSGIMiddleware(flask_app, workers=int(os.environ.get('WSGI_WORKERS', 10)))),
+    ],
+    lifespan=lifespan,
+)
+
+
+if __name__ == '__main__':
+    import uvicorn
+
+    uvicorn.run('AsyncBackend:app', port=5000, workers=int(os.environ.get('WEB_CONCURRENCY', 2)))
@@ -0,0 +1,150 @@
+# Lastmessung für alle /api/*-Routen gegen ein laufendes Backend
+#
+#   python Benchmark.py --concurrency 8 --requests 50
+#   python Benchmark.py --save vorher.json          (vor einer Query-Änderung)
+#   python Benchmark.py --compare vorher.json       (danach, zeigt die Veränderung in %)
+#
+# kalt: jede Anfrage schickt "Cache-Control: no-store", umgeht also den Response-Cache des Backends
+#       und läuft bis zur Datenbank durch, ohne Einträge im Cache zu hinterlassen
+#       (im Backend nicht mit API_CACHE_BYPASS=0 gestartet).
+# warm: dieselbe URL nach einmaligem Vorladen, gemessen wird die Auslieferung aus dem Cache.
+# Die Routen und ihre Parameter (z.B. je Store und Jahr) kommen aus der Warm-up-Konfiguration
+# des Backends, mit --routes lassen sie sich einschränken.
+
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+import itertools
+import json
+import random
+import threading
+import time
+from urllib.parse import urlencode
+
+import numpy as np
+import requests
+
+thread_local = threading.local()
+
+
+def http_session():
+    if not hasattr(thread_local, 'session'):
+        thread_local.session = requests.Session()
+    return thread_local.session
+
+
+def discover_urls(variants, seed):
+    # Backend erst hier importieren, damit --urls ohne Datenbankzugriff funktioniert
+    from Backend import app, cached_endpoints
+
+    rng = random.Random(seed)
+    urls = {}
+    with app.app_context():
+        for rule in app.url_map.iter_rules():
+            if not rule.rule.startswith('/api/') or rule.rule.startswith('/api/_') or rule.arguments:
+                continue
+            warm_up = cached_endpoints.get(rule.endpoint)
+            params = warm_up() if warm_up else [{}]
+            params = rng.sample(params, min(variants, len(params)))
+            urls[rule.rule] = [f"{rule.rule}?{urlencode(args)}" if args else rule.rule for args in params]
+    return urls
+
+
+# Header je Modus: kalt am Response-Cache vorbei, warm aus dem Cache
+MODE_HEADERS = {'cold': {'Cache-Control': 'no-store'}, 'warm': {}}
+
+
+def timed_get(base_url, url, headers=None):
+    started = time.perf_counter()
+    try:
+        response = http_session().get(base_url + url, headers=headers, timeout=300)
+        return time.perf_counter() - started, response.status_code == 200 and b'"error"' not in response.content[:20], len(response.content)
+    except requests.RequestException:
+        return time.perf_counter() - started, False, 0
+
+
+def run_mode(base_url, urls, mode, requests_per_route, concurrency):
+    if mode == 'warm':
+        for url in urls:
+            timed_get(base_url, url)
+    jobs = list(itertools.islice(itertools.cycle(urls), requests_per_route))
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        results = list(executor.map(lambda url: timed_get(base_url, url, MODE_HEADERS[mode]), jobs))
+    elapsed = time.perf_counter() - started
+
+    latencies = np.array([latency for latency, _, _ in results]) * 1000
+    return {
+        'requests': len(results),
+        'errors': sum(1 for _, ok, _ in results if not ok),
+        'p50_ms': float(np.percentile(latencies, 50)),
+        'p95_ms': float(np.percentile(latencies, 95)),
+        'p99_ms': float(np.percentile(latencies, 99)),
+        'throughput_rps': len(results) / elapsed,
+        'avg_bytes': float(np.mean([size for _, _, size in results])),
+    }
+
+
+def print_report(report, baseline=None):
+    header = f"{'Route':<34} {'Modus':<5} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'req/s':>8} {'KB':>8} {'Fehler':>6}"
+    print(header)
+    print('-' * len(header))
+    for route, modes in report['routes'].items():
+        for mode, stats in modes.items():
+            line = (f"{route:<34} {mode:<5} {stats['p50_ms']:>9.1f} {stats['p95_ms']:>9.1f} {stats['p99_ms']:>9.1f} "
+                    f"{stats['throughput_rps']:>8.1f} {stats['avg_bytes'] / 1024:>8.1f} {stats['errors']:>6}")
+            previous = (baseline or {}).get('routes', {}).get(route, {}).get(mode)
+            if previous:
+                change = (stats['p95_ms'] - previous['p95_ms']) / previous['p95_ms'] * 100 if previous['p95_ms'] else 0
+                line += f"   p95 {change:+.0f}%"
+            print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Latenz und Durchsatz der Backend-Routen messen')
+    parser.add_argument('--base-url', default='http://localhost:5000')
+    parser.add_argument('--concurrency', type=int, default=4, help='Gleichzeitige Anfragen')
+    parser.add_argument('--requests', type=int, default=20, help='Anfragen je Route und Modus')
+    parser.add_argument('--variants', type=int, default=5, help='Verschiedene Parameter-Kombinationen je Route')
+    parser.add_argument('--modes', default='cold,warm', help='cold, warm oder beides')
+    parser.add_argument('--routes', nargs='*', help='Nur diese Routen messen (z.B. /api/metrics)')
+    parser.add_argument('--urls', nargs='*', help='Feste URLs statt der Routen aus dem Backend')
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--save', help='Ergebnis als JSON speichern')
+    parser.add_argument('--compare', help='Mit einem gespeicherten Ergebnis vergleichen')
+    args = parser.parse_args()
+
+    if args.urls:
+        urls = {url: [url] for url in args.urls}
+    else:
+        urls = discover_urls(args.variants, args.seed)
+    if args.routes:
+        urls = {route: route_urls for route, route_urls in urls.items() if route in args.routes}
+
+    report = {
+        'base_url': args.base_url,
+        'concurrency': args.concurrency,
+        'requests': args.requests,
+        'started': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'routes': {},
+    }
+    for route, route_urls in urls.items():
+        report['routes'][route] = {
+            mode: run_mode(args.base_url, route_urls, mode, args.requests, args.concurrency)
+            for mode in args.modes.split(',')
+        }
+        print(f"{route} gemessen", flush=True)
+
+    baseline = None
+    if args.compare:
+        with open(args.compare) as file:
+            baseline = json.load(file)
+    print()
+    print_report(report, baseline)
+    if args.save:
+        with open(args.save, 'w') as file:
+            json.dump(report, file, indent=2)
+
+
+if __name__ == '__main__':
+    main()
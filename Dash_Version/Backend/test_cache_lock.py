@@ -0,0 +1,61 @@
+# Single-Flight-Lock im geteilten Dateisystem-Cache: ein abgelaufener Lock eines abgestürzten
+# Prozesses darf weder Cache-Misses bis API_CACHE_WAIT_TIMEOUT blockieren noch Aktualisierungen sperren.
+#
+#   python -m pytest test_cache_lock.py
+#
+# Braucht keine Datenbank, der Cache liegt in einem eigenen temporären Verzeichnis.
+
+import os
+import tempfile
+import time
+
+os.environ['CACHE_TYPE'] = 'FileSystemCache'
+os.environ['CACHE_DIR'] = tempfile.mkdtemp(prefix='pizza_dashboard_cache_test_')
+
+import pytest
+
+from Backend import acquire_cache_lock, app, cache, release_cache_lock, wait_for_cache_entry
+
+
+@pytest.fixture(autouse=True)
+def lock_config():
+    previous = app.config['API_CACHE_LOCK_TIMEOUT'], app.config['API_CACHE_WAIT_TIMEOUT']
+    app.config['API_CACHE_LOCK_TIMEOUT'] = 1
+    app.config['API_CACHE_WAIT_TIMEOUT'] = 5
+    with app.app_context():
+        cache.clear()
+        yield
+    app.config['API_CACHE_LOCK_TIMEOUT'], app.config['API_CACHE_WAIT_TIMEOUT'] = previous
+
+
+def test_lock_is_exclusive_until_released():
+    token = acquire_cache_lock('api:json:/api/test?')
+    assert token
+    assert acquire_cache_lock('api:json:/api/test?') is None
+    release_cache_lock('api:json:/api/test?', token)
+    assert acquire_cache_lock('api:json:/api/test?')
+
+
+def test_orphaned_lock_is_taken_over_after_expiry():
+    # Besitzer stirbt ohne release_cache_lock, die Lock-Datei bleibt liegen
+    orphaned = acquire_cache_lock('api:json:/api/test?')
+    assert orphaned
+    time.sleep(1.1)
+
+    started = time.monotonic()
+    entry, token = wait_for_cache_entry('api:json:/api/test?')
+    assert entry is None
+    assert token and token != orphaned
+    assert time.monotonic() - started < 1
+
+
+def test_expired_owner_does_not_release_new_lock():
+    orphaned = acquire_cache_lock('api:json:/api/test?')
+    time.sleep(1.1)
+    token = acquire_cache_lock('api:json:/api/test?')
+    assert token
+
+    release_cache_lock('api:json:/api/test?', orphaned)
+    assert acquire_cache_lock('api:json:/api/test?') is None
+    release_cache_lock('api:json:/api/test?', token)
+    assert acquire_cache_lock('api:json:/api/test?')
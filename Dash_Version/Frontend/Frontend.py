@@ -9,6 +9,13 @@ import requests
 from dash import callback_context
 import itertools
 
+try:
+    import pyarrow as pa
+except ImportError:
+    pa = None
+
+ARROW_MIMETYPE = 'application/vnd.apache.arrow.stream'
+
 app = dash.Dash(__name__, external_stylesheets=[dbc.themes.BOOTSTRAP])
 app.config.suppress_callback_exceptions = True
 
@@ -45,22 +52,56 @@ sidebar = html.Div(
     style=sidebar_styles,
 )
 
-def fetch_data(url):
+# Lokale Kopien der API-Antworten (URL -> (ETag, Antwort)). Bei unveränderten Daten antwortet
+# das Backend mit 304 und der gespeicherte Body wird erneut geparst, damit jeder Aufruf eigene
+# Objekte bekommt (die Callbacks ändern DataFrames in place). Die Session hält die
+# Verbindung offen und handelt gzip/Brotli automatisch aus.
+http_session = requests.Session()
+response_cache = {}
+
+def fetch_response(url, parse, headers=None):
     try:
-        response = requests.get(url)
+        cached = response_cache.get(url)
+        headers = dict(headers or {})
+        if cached:
+            headers['If-None-Match'] = cached[0]
+        response = http_session.get(url, headers=headers)
+        if response.status_code == 304 and cached:
+            return parse(cached[1])
         response.raise_for_status()
-        data = response.json()
+        data = parse(response)
+        etag = response.headers.get('ETag')
+        if etag:
+            response_cache[url] = (etag, response)
         return data
     except requests.RequestException as e:
         return None
 
+
+def fetch_data(url):
+    return fetch_response(url, lambda response: response.json())
+
+
+# Tabellarische Endpunkte direkt als DataFrame laden: mit pyarrow als Arrow-Stream, sonst als
+# spaltenorientiertes JSON (?format=columns). Beides spart das Umwandeln einer Objektliste.
+def fetch_frame(url, key):
+    if pa is not None:
+        def parse(response):
+            if response.headers.get('Content-Type', '').startswith(ARROW_MIMETYPE):
+                return pa.ipc.open_stream(response.content).read_all().to_pandas()
+            return pd.DataFrame(response.json().get(key, {}))
+        return fetch_response(url, parse, {'Accept': ARROW_MIMETYPE})
+
+    separator = '&' if '?' in url else '?'
+    return fetch_response(f"{url}{separator}format=columns", lambda response: pd.DataFrame(response.json().get(key, {})))
+
 # Function for creating the Sales Map
 def create_sales_heatmap(selected_year):
-    revenue_data = fetch_data(f"http://localhost:5000/api/store_annual_revenues")
-    if revenue_data:
+    revenue_data = fetch_data(f"http://localhost:5000/api/store_annual_revenues?year={selected_year}")
+    if revenue_data and revenue_data.get('store_annual_revenues'):
         data = pd.DataFrame(revenue_data['store_annual_revenues'])
-        data_year = data[['storeid', 'latitude', 'longitude', 'city', f'revenue_{selected_year}']].copy()
-        data_year['Revenue'] = pd.to_numeric(data_year[f'revenue_{selected_year}'])
+        data_year = data[['storeid', 'latitude', 'longitude', 'city', 'revenue']].copy()
+        data_year['Revenue'] = pd.to_numeric(data_year['revenue'])
 
         data_year = data_year.sort_values(by='Revenue', ascending=False)
 
@@ -91,17 +132,14 @@ def create_sales_heatmap(selected_year):
 
 # Weekyday Bar chart
 def create_weekday_revenue_bar_chart(store_id, selected_year):
-    endpoint = "http://localhost:5000/api/revenue_per_weekday"
-    data = fetch_data(endpoint)
+    endpoint = f"http://localhost:5000/api/revenue_per_weekday?store_id={store_id}&year={selected_year}"
+    df = fetch_frame(endpoint, 'revenue_per_weekday')
     
-    if data:
-        revenue_data = data.get('revenue_per_weekday', [])
-        if not revenue_data:
+    if df is not None:
+        if df.empty:
             print("No revenue data available")
             return go.Figure()
 
-        df = pd.DataFrame(revenue_data)
-
         df['order_day_of_week'] = pd.to_numeric(df['order_day_of_week'])
         df['total_revenue'] = pd.to_numeric(df['total_revenue'])
         df['order_year'] = pd.to_numeric(df['order_year'])
@@ -131,11 +169,10 @@ def create_weekday_revenue_bar_chart(store_id, selected_year):
 
 # Hours bar chart
 def create_hourly_orders_bar_chart(store_id, selected_year):
-    url = "http://localhost:5000/api/store_orders_per_hour"
-    data = fetch_data(url)
+    url = f"http://localhost:5000/api/store_orders_per_hour?store_id={store_id}&year={selected_year}"
+    df = fetch_frame(url, 'store_orders_per_hour')
     
-    if data:
-        df = pd.DataFrame(data['store_orders_per_hour'])
+    if df is not None:
         df['order_year'] = pd.to_numeric(df['order_year'])
 
         df = df[(df['storeid'] == store_id) & (df['order_year'] == int(selected_year))]
@@ -201,7 +238,7 @@ def format_sales_value(value):
     
 # monthly sales
 def show_monthly_sales(store_id, year):
-    endpoint = f"http://localhost:5000/api/store_monthly_revenues"
+    endpoint = f"http://localhost:5000/api/store_monthly_revenues?store_id={store_id}&year={year}"
     data = fetch_data(endpoint)
     
     if data:
@@ -372,61 +409,30 @@ def highlight_rows(df, store_colors):
             styles.append({'if': {'filter_query': f'{{Store}} = "{store_id}"', 'column_id': 'Revenue in USD'}, 'backgroundColor': color})
     return styles
 
-# Table Top 5 Stores
-def create_top_stores_table(year, store_colors, color_generator):
-    top_stores_data = fetch_data(f"http://localhost:5000/api/top_5_stores")
-    
-    if top_stores_data:
-        data = [store for store in top_stores_data['top_5_stores'] if store['year'] == year] 
-        if data:
-            df = pd.DataFrame(data)
-            df['annual_sales'] = pd.to_numeric(df['annual_sales'], errors='coerce')  
-            df = df.sort_values(by='annual_sales', ascending=False).head(5)  
-            df = df[['storeid', 'annual_sales']] 
-            df.columns = ['Store', 'Revenue in USD'] 
-            
-           
-            df['Revenue in USD'] = df['Revenue in USD'].apply(lambda x: f"${x:,.2f}")
-            
-           
-            store_counts = df['Store'].value_counts()
-            repeating_stores = store_counts[store_counts > 1].index
-            for store_id in df['Store']:
-                if store_id in repeating_stores and store_id not in store_colors:
-                    store_colors[store_id] = next(color_generator)
-            
-            
-            styles = highlight_rows(df, store_colors)
-            
-            table = dbc.Table.from_dataframe(df, striped=True, bordered=True, hover=True)
-            return table, styles
-    return html.Div("No data available"), []
+# Tables Top/Worst 5 Stores: beide Ranglisten aller Jahre kommen aus einer Anfrage
+def fetch_store_rankings():
+    return fetch_data("http://localhost:5000/api/store_rankings")
 
-# Table Worst 5 Stores
-def create_worst_stores_table(year, store_colors, color_generator):
-    worst_stores_data = fetch_data(f"http://localhost:5000/api/worst_5_stores")
-    
-    if worst_stores_data:
-        data = [store for store in worst_stores_data['worst_5_stores'] if store['year'] == year]  
+def create_store_ranking_table(rankings, direction, year, store_colors, color_generator):
+    if rankings and direction in rankings:
+        data = [store for store in rankings[direction] if store['year'] == year]
         if data:
             df = pd.DataFrame(data)
-            df['annual_sales'] = pd.to_numeric(df['annual_sales'], errors='coerce')  
-            df = df.sort_values(by='annual_sales', ascending=True).head(5)  
-            df = df[['storeid', 'annual_sales']]  
-            df.columns = ['Store', 'Revenue in USD'] 
-            
+            df['value'] = pd.to_numeric(df['value'], errors='coerce')
+            df = df.sort_values(by='rank')
+            df = df[['storeid', 'value']]
+            df.columns = ['Store', 'Revenue in USD']
+
             df['Revenue in USD'] = df['Revenue in USD'].apply(lambda x: f"${x:,.2f}")
-            
-            
+
             store_counts = df['Store'].value_counts()
             repeating_stores = store_counts[store_counts > 1].index
             for store_id in df['Store']:
                 if store_id in repeating_stores and store_id not in store_colors:
                     store_colors[store_id] = next(color_generator)
-            
-           
+
             styles = highlight_rows(df, store_colors)
-            
+
             table = dbc.Table.from_dataframe(df, striped=True, bordered=True, hover=True)
             return table, styles
     return html.Div("No data available"), []
@@ -930,13 +936,15 @@ def update_stores_tables(selected_year):
     store_colors = {}
     color_generator = generate_colors()
     
-    top_stores_2020, _ = create_top_stores_table(2020, store_colors, color_generator)
-    top_stores_2021, _ = create_top_stores_table(2021, store_colors, color_generator)
-    top_stores_2022, _ = create_top_stores_table(2022, store_colors, color_generator)
+    rankings = fetch_store_rankings()
+
+    top_stores_2020, _ = create_store_ranking_table(rankings, 'top', 2020, store_colors, color_generator)
+    top_stores_2021, _ = create_store_ranking_table(rankings, 'top', 2021, store_colors, color_generator)
+    top_stores_2022, _ = create_store_ranking_table(rankings, 'top', 2022, store_colors, color_generator)
     
-    worst_stores_2020, _ = create_worst_stores_table(2020, store_colors, color_generator)
-    worst_stores_2021, _ = create_worst_stores_table(2021, store_colors, color_generator)
-    worst_stores_2022, _ = create_worst_stores_table(2022, store_colors, color_generator)
+    worst_stores_2020, _ = create_store_ranking_table(rankings, 'bottom', 2020, store_colors, color_generator)
+    worst_stores_2021, _ = create_store_ranking_table(rankings, 'bottom', 2021, store_colors, color_generator)
+    worst_stores_2022, _ = create_store_ranking_table(rankings, 'bottom', 2022, store_colors, color_generator)
     
     return top_stores_2020, top_stores_2021, top_stores_2022, worst_stores_2020, worst_stores_2021, worst_stores_2022
 